@@ -0,0 +1,156 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import os
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Any, Iterator
+
+from filing_embedder_openai import embed_filing_chunks
+from langchain_tidb_rag import ask_question_with_context, format_context, RETRIEVER_CHUNKS
+from tidb_financial_statements_vector_store import query_ticker_chunks_batch
+
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '8'))
+BATCH_REQUESTS_PER_MINUTE = int(os.getenv('BATCH_REQUESTS_PER_MINUTE', '60'))
+
+class _RateLimiter:
+    def __init__(self, requests_per_minute: int):
+        self._interval = 60 / requests_per_minute
+        self._next_time = 0.0
+        self._lock = Lock()
+
+    # blocks until the caller may send its request, spacing requests evenly
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+def answer_questions(jobs: list[tuple[str, str]],
+                     max_concurrency: int = BATCH_MAX_CONCURRENCY,
+                     requests_per_minute: int = BATCH_REQUESTS_PER_MINUTE) -> Iterator[dict[str, Any]]:
+    """
+    Answers (ticker, question) jobs, yielding one result dict per job as it completes and a final summary dict.
+
+    All distinct questions are embedded in one batched request, retrieval runs once per ticker on a shared
+    connection, and LLM calls run concurrently under the requests-per-minute limit.
+    """
+
+    start_time = time.time()
+
+    questions_by_ticker: dict[str, list[str]] = {}
+    for ticker, question in jobs:
+        questions_by_ticker.setdefault(ticker, []).append(question)
+
+    rate_limiter = _RateLimiter(requests_per_minute)
+    answered = 0
+    errors = 0
+
+    questions = list(dict.fromkeys(question for _, question in jobs))
+    try:
+        query_vectors = dict(zip(questions, embed_filing_chunks(questions)))
+        print(f'Embedded {len(questions)} distinct questions in: {round(time.time() - start_time, 2)} secs')
+    except Exception as e: # the response has already started streaming, so report it per job instead of cutting the stream off
+        print(f'Error embedding {len(questions)} questions: {e}')
+        query_vectors = None
+        for ticker, question in jobs:
+            errors += 1
+            yield _build_result(ticker, question, error=f'Error embedding questions: {e}')
+
+    retrieval_executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    llm_executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    cancelled = False
+    try:
+        retrieval_futures = {
+            retrieval_executor.submit(_retrieve_contexts, ticker, ticker_questions, query_vectors): ticker
+            for ticker, ticker_questions in questions_by_ticker.items()
+        } if query_vectors is not None else {}
+
+        # one loop over both kinds of futures, so answers stream while other tickers are still being retrieved
+        pending = set(retrieval_futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in retrieval_futures:
+                    result = future.result()
+                    if result['error']:
+                        errors += 1
+                    else:
+                        answered += 1
+                    yield result
+                    continue
+
+                ticker = retrieval_futures[future]
+                try:
+                    contexts = future.result()
+                except Exception as e:
+                    print(f'Error retrieving [{ticker}] chunks: {e}')
+                    for question in questions_by_ticker[ticker]:
+                        errors += 1
+                        yield _build_result(ticker, question, error=f'Error retrieving [{ticker}] chunks: {e}')
+                    continue
+
+                for question, context in contexts:
+                    if context is None:
+                        errors += 1
+                        yield _build_result(ticker, question, error=f'No financial statements loaded for: {ticker}')
+                    else:
+                        pending.add(llm_executor.submit(_answer_question, ticker, question, context, rate_limiter))
+
+    except GeneratorExit: # e.g. the client disconnected, don't pay for answers nobody will read
+        cancelled = True
+        print(f'Batch of {len(jobs)} questions cancelled after {answered} answered')
+        raise
+
+    finally:
+        retrieval_executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+        llm_executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+
+    total_duration = time.time() - start_time
+    questions_per_minute = round(answered / total_duration * 60, 2) if total_duration else 0.0
+    print(f'Batch of {len(jobs)} questions: {answered} answered, {errors} errors in {round(total_duration, 2)} secs ({questions_per_minute} questions/min)')
+    yield {'summary': {'questions': len(jobs), 'answered': answered, 'errors': errors,
+                       'elapsed_secs': round(total_duration, 2), 'questions_per_minute': questions_per_minute}}
+
+# returns (question, context) pairs, context is None if the ticker has no chunks in the vector store
+def _retrieve_contexts(ticker: str, questions: list[str], query_vectors: dict[str, list[float]]) -> list[tuple[str, str | None]]:
+    results = query_ticker_chunks_batch(ticker, [query_vectors[question] for question in questions], k=RETRIEVER_CHUNKS)
+    return [(question, format_context(chunks) if chunks else None) for question, chunks in zip(questions, results)]
+
+def _answer_question(ticker: str, question: str, context: str, rate_limiter: _RateLimiter) -> dict[str, Any]:
+    rate_limiter.wait()
+    start_time = time.time()
+    try:
+        answer = ask_question_with_context(ticker, question, context)
+        return _build_result(ticker, question, answer=answer, elapsed_secs=time.time() - start_time)
+
+    except Exception as e:
+        print(f'Error answering [{ticker}] {question}: {e}')
+        return _build_result(ticker, question, error=str(e), elapsed_secs=time.time() - start_time)
+
+def _build_result(ticker: str, question: str, answer: str = None, error: str = None, elapsed_secs: float = 0.0) -> dict[str, Any]:
+    return {'ticker': ticker, 'question': question, 'answer': answer, 'error': error, 'elapsed_secs': round(elapsed_secs, 2)}
+
+if __name__ == '__main__':
+    # usage: python batch_question_answerer.py jobs.jsonl answers.ndjson
+    # where each line of jobs.jsonl is like: {"ticker": "MSFT", "question": "What is the AI strategy?"}
+    parser = argparse.ArgumentParser(description='Answer a batch of (ticker, question) jobs, writing NDJSON results.')
+    parser.add_argument('jobs_file', help='JSONL file with one {"ticker": ..., "question": ...} object per line')
+    parser.add_argument('output_file', help='NDJSON file to write results to')
+    parser.add_argument('--max-concurrency', type=int, default=BATCH_MAX_CONCURRENCY)
+    parser.add_argument('--requests-per-minute', type=int, default=BATCH_REQUESTS_PER_MINUTE)
+    args = parser.parse_args()
+
+    with open(args.jobs_file, 'r', encoding='utf-8') as f:
+        jobs = [(job['ticker'], job['question']) for job in map(json.loads, filter(str.strip, f))]
+
+    with open(args.output_file, 'w', encoding='utf-8') as f:
+        for result in answer_questions(jobs, args.max_concurrency, args.requests_per_minute):
+            f.write(f'{json.dumps(result)}\n')
+            f.flush()
@@ -0,0 +1,157 @@
+import heapq
+import re
+import time
+
+from bisect import bisect_left
+from functools import cache
+from threading import Lock, Thread
+
+from edgar_cik import get_companies
+from tidb_financial_statements_vector_store import get_vector_store_tickers
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_CACHED_SEARCHES = 10_000 # typing the same prefixes is common, so results are cached until the loaded companies change
+MIN_TRIGRAM_SIMILARITY = 0.5 # fraction of the query's trigrams a company must share to match on trigrams
+
+# scores for how a company matches the query, the best match wins
+EXACT_TICKER_SCORE = 100
+TICKER_PREFIX_SCORE = 60
+NAME_PREFIX_SCORE = 50
+NAME_WORD_PREFIX_SCORE = 40
+TRIGRAM_SCORE = 20 # scaled by similarity
+LOADED_BOOST = 25 # companies already in the vector store answer right away
+
+class CompanySearchIndex:
+    def __init__(self, companies: dict[str, str]):
+        self._tickers = list(companies.keys()) # already sorted by company name
+        self._titles = list(companies.values())
+        self._folded_titles = [title.casefold() for title in self._titles]
+        self._loaded: set[int] = set()
+        self._cache: dict[tuple[str, int], list[tuple[str, str]]] = {}
+        self._lock = Lock()
+        self._ticker_positions = {ticker: i for i, ticker in enumerate(self._tickers)}
+
+        # sorted (key, position) pairs so all keys with a given prefix are one contiguous bisect range
+        self._ticker_keys = sorted((ticker.casefold(), i) for i, ticker in enumerate(self._tickers))
+        self._word_keys = sorted({(word, i) for i, title in enumerate(self._folded_titles) for word in _split_words(title)})
+
+        self._trigrams: dict[str, list[int]] = {}
+        for i, (ticker, title) in enumerate(zip(self._tickers, self._folded_titles)):
+            for trigram in _get_trigrams(f'{ticker.casefold()} {title}'):
+                self._trigrams.setdefault(trigram, []).append(i)
+
+    def mark_loaded(self, ticker: str) -> None:
+        i = self._ticker_positions.get(ticker)
+        if i is not None and i not in self._loaded:
+            with self._lock:
+                self._loaded.add(i)
+                self._cache.clear() # rankings change
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[tuple[str, str]]:
+        """
+        Finds companies by ticker or name.
+
+        Args:
+            query (str): Ticker or (partial) company name, case insensitive.
+            limit (int): Max number of matches.
+
+        Returns:
+            list[tuple[str, str]]: (ticker, title) pairs, best match first.
+        """
+
+        query = query.strip().casefold()
+        key = (query, limit)
+        matches = self._cache.get(key)
+        if matches is None:
+            matches = self._search(query, limit)
+            with self._lock:
+                if len(self._cache) >= MAX_CACHED_SEARCHES:
+                    self._cache.clear()
+                self._cache[key] = matches
+        return matches
+
+    def _search(self, query: str, limit: int) -> list[tuple[str, str]]:
+        with self._lock: # mark_loaded can add to the set while it is being walked
+            loaded = set(self._loaded)
+        if not query: # loaded companies first, then by name
+            positions = sorted(loaded)[:limit]
+            for i in range(len(self._tickers)):
+                if len(positions) >= limit:
+                    break
+                if i not in loaded:
+                    positions.append(i)
+            return [(self._tickers[i], self._titles[i]) for i in positions]
+
+        scores: dict[int, float] = {}
+        for key, i in self._prefix_range(self._ticker_keys, query):
+            scores[i] = EXACT_TICKER_SCORE if key == query else TICKER_PREFIX_SCORE
+
+        words = _split_words(query)
+        if words:
+            # every query word must prefix some word of the name, e.g. "micro corp" -> "Microsoft Corp"
+            candidates = {i for _, i in self._prefix_range(self._word_keys, words[0])}
+            for word in words[1:]:
+                candidates.intersection_update(i for _, i in self._prefix_range(self._word_keys, word))
+            folded_titles = self._folded_titles
+            for i in candidates:
+                score = NAME_PREFIX_SCORE if folded_titles[i].startswith(query) else NAME_WORD_PREFIX_SCORE
+                if score > scores.get(i, 0):
+                    scores[i] = score
+
+        if not scores: # fall back to fuzzy trigram matches (typos, missing spaces)
+            query_trigrams = _get_trigrams(query)
+            if query_trigrams:
+                counts: dict[int, int] = {}
+                for trigram in query_trigrams:
+                    for i in self._trigrams.get(trigram, ()):
+                        counts[i] = counts.get(i, 0) + 1
+                for i, count in counts.items():
+                    similarity = count / len(query_trigrams)
+                    if similarity >= MIN_TRIGRAM_SIMILARITY:
+                        scores[i] = TRIGRAM_SCORE * similarity
+
+        titles = self._titles
+        ranked = heapq.nsmallest(limit, scores, key=lambda i: (-(scores[i] + (LOADED_BOOST if i in loaded else 0)), len(titles[i]), i))
+        return [(self._tickers[i], titles[i]) for i in ranked]
+
+    def _prefix_range(self, keys: list[tuple[str, int]], prefix: str) -> list[tuple[str, int]]:
+        start = bisect_left(keys, (prefix, -1))
+        end = bisect_left(keys, (prefix + '\uffff', -1), lo=start)
+        return keys[start:end]
+
+def _split_words(text: str) -> list[str]:
+    return [word for word in re.split(r'[^0-9a-z]+', text) if word]
+
+def _get_trigrams(text: str) -> set[str]:
+    text = re.sub(r'[^0-9a-z]+', '', text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+@cache
+def get_company_search_index() -> CompanySearchIndex:
+    start_time = time.time()
+    index = CompanySearchIndex(get_companies())
+    print(f'Elapsed time to build company search index: {round(time.time() - start_time, 2)} secs')
+    Thread(target=_mark_vector_store_tickers_loaded, args=(index,), daemon=True).start() # searches work meanwhile, just without the boost
+    return index
+
+# seeds the loaded companies with the ones already in the vector store, e.g. bulk loaded or loaded by other instances
+def _mark_vector_store_tickers_loaded(index: CompanySearchIndex) -> None:
+    try:
+        for ticker in get_vector_store_tickers():
+            index.mark_loaded(ticker)
+    except Exception as e:
+        print(f'Error getting tickers in vector store: {e}')
+
+def search_companies(query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[tuple[str, str]]:
+    return get_company_search_index().search(query, limit)
+
+def mark_ticker_loaded(ticker: str) -> None:
+    get_company_search_index().mark_loaded(ticker)
+
+if __name__ == '__main__':
+    # test usage
+    mark_ticker_loaded('MSFT')
+    for query in ['', 'AAPL', 'micro', 'micro corp', 'nvdia', 'berkshire b']:
+        start_time = time.perf_counter()
+        matches = search_companies(query)
+        print(f'{query!r} ({round((time.perf_counter() - start_time) * 1000, 3)} ms): {matches[:5]}')
@@ -1,23 +1,52 @@
 import json
+import os
+import pickle
 
+from functools import cache
 from typing import Any
 
 # read tickers and CIKs (Central Index Keys) from company_tickers.json file, downloaded manually from: https://www.sec.gov/files/company_tickers.json
-with open('data/company_tickers.json', 'r', encoding='utf-8') as f:
-    data: dict[str, dict[str, Any]] = json.load(f)
-
-cik_map: dict[str, str] = {v['ticker']: str(v['cik_str']) for v in data.values()}
-cik_map = dict(sorted(cik_map.items()))
-
-company_map: dict[str, str] = {v['ticker']: v['title'].title() if v['title'].isupper() else v['title'] for v in data.values()}
-company_map = dict(sorted(company_map.items(), key=lambda item: (item[1].casefold(), item[0])))
+COMPANY_TICKERS_FILE_PATH = 'data/company_tickers.json'
+# the parsed and sorted maps are cached here, and rebuilt whenever company_tickers.json is newer
+COMPANY_TICKERS_CACHE_FILE_PATH = 'data/company_tickers.pickle'
 
 def get_cik(ticker: str) -> str:
+    cik_map, _ = _get_maps()
     return cik_map[ticker].zfill(10) if ticker in cik_map else None
 
 def get_companies() -> dict[str, str]:
+    _, company_map = _get_maps()
     return company_map
 
+@cache
+def _get_maps() -> tuple[dict[str, str], dict[str, str]]:
+    if os.path.exists(COMPANY_TICKERS_CACHE_FILE_PATH) and \
+       os.path.getmtime(COMPANY_TICKERS_CACHE_FILE_PATH) >= os.path.getmtime(COMPANY_TICKERS_FILE_PATH):
+        try:
+            with open(COMPANY_TICKERS_CACHE_FILE_PATH, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f'Error: reading {COMPANY_TICKERS_CACHE_FILE_PATH} -> {e}')
+
+    maps = _build_maps()
+    try:
+        with open(COMPANY_TICKERS_CACHE_FILE_PATH, 'wb') as f:
+            pickle.dump(maps, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f'Error: writing {COMPANY_TICKERS_CACHE_FILE_PATH} -> {e}')
+    return maps
+
+def _build_maps() -> tuple[dict[str, str], dict[str, str]]:
+    with open(COMPANY_TICKERS_FILE_PATH, 'r', encoding='utf-8') as f:
+        data: dict[str, dict[str, Any]] = json.load(f)
+
+    cik_map: dict[str, str] = {v['ticker']: str(v['cik_str']) for v in data.values()} # lookup only, no need to sort
+
+    company_map: dict[str, str] = {v['ticker']: v['title'].title() if v['title'].isupper() else v['title'] for v in data.values()}
+    company_map = dict(sorted(company_map.items(), key=lambda item: (item[1].casefold(), item[0])))
+
+    return cik_map, company_map
+
 if __name__ == '__main__':
     # test usage
     ticker = 'AAPL'
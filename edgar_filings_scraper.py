@@ -11,7 +11,7 @@ import unicodedata
 
 from brotli import decompress
 from bs4 import BeautifulSoup
-from typing import Any
+from typing import Any, Callable
 from urllib.parse import urlparse
 
 from edgar_cik import get_cik
@@ -23,6 +23,8 @@ DEFAULT_DATA_DIR = 'data'
 UTF_8_ENCODING = 'utf-8'
 
 SCRAPING_USER_AGENT = os.getenv('SCRAPING_USER_AGENT')
+# can point to a local server with CIK##########.json fixture files for testing
+EDGAR_SUBMISSIONS_BASE_URL = os.getenv('EDGAR_SUBMISSIONS_BASE_URL', 'https://data.sec.gov/submissions')
 BROWSER_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0'
 
 def scrape_filings_from_edgar(ticker: str) -> tuple[list[str], list[str], list[str]]:
@@ -36,7 +38,7 @@ def scrape_filings_from_edgar(ticker: str) -> tuple[list[str], list[str], list[s
 
     filing_urls, filing_titles, filing_dates = _edgar_save_filing_metadata(ticker)
 
-    _edgar_save_filing_text(ticker, filing_urls)
+    edgar_save_filing_text(ticker, filing_urls)
 
     return filing_urls, filing_titles, filing_dates
 
@@ -48,13 +50,99 @@ def _get_edgar_submissions_json_file(ticker: str) -> None:
     if os.path.exists(submissions_json_file_path):
         return
 
-    submissions_json_url = f'https://data.sec.gov/submissions/CIK{cik}.json'
+    submissions_json_url = f'{EDGAR_SUBMISSIONS_BASE_URL}/CIK{cik}.json'
     # for example: https://data.sec.gov/submissions/CIK0000059478.json
     print(f'[{ticker}]: GET {submissions_json_url}')
     submissions_json = _get_json(submissions_json_url, mimic_browser=True)
     with open(submissions_json_file_path, 'w', encoding=UTF_8_ENCODING) as f:
         json.dump(submissions_json, f)
 
+def scrape_new_filings_from_edgar(ticker: str, record_new_filings: Callable[[list[str], list[str], list[str]], None] = None,
+                                  save_filing_text: bool = True,
+                                  get_known_filing_urls: Callable[[], set[str]] = None) -> tuple[list[str], list[str], list[str]]:
+    """
+    Refetches the ticker's submissions feed if it changed since the last fetch, and finds the filings not seen before.
+
+    The saved filing metadata and feed validators only move past the new filings once record_new_filings returns,
+    so if it fails (or the process stops) the next call detects the same filings again.
+
+    Args:
+        ticker (str): A ticker already scraped with scrape_filings_from_edgar.
+        record_new_filings (Callable[[list[str], list[str], list[str]], None]): Persists the URLs, titles and dates of the new filings.
+        save_filing_text (bool): Whether to also download the text of the new filings, best effort since they are already recorded.
+        get_known_filing_urls (Callable[[], set[str]]): URLs of the filings already loaded, used when the ticker wasn't scraped
+            on this machine (e.g. it was loaded elsewhere), instead of treating every filing in the feed as new.
+
+    Returns:
+        tuple[list[str], list[str], list[str]]: URLs, titles and dates of the new filings only.
+    """
+
+    if not get_cik(ticker):
+        return [], [], []
+    validators = _refresh_edgar_submissions_json_file(ticker)
+    if validators is None:
+        return [], [], []
+
+    old_filing_urls = set()
+    urls_file_path = f'{DEFAULT_DATA_DIR}/{ticker}/filing_urls_{ticker}.txt'
+    if os.path.exists(urls_file_path):
+        with open(urls_file_path, 'r', encoding=UTF_8_ENCODING) as f:
+            old_filing_urls = {line.strip() for line in f}
+    elif get_known_filing_urls:
+        old_filing_urls = get_known_filing_urls()
+
+    filing_urls, filing_titles, filing_dates = _edgar_extract_filing_metadata(ticker)
+    new_filings = [(url, title, date) for url, title, date in zip(filing_urls, filing_titles, filing_dates) if url not in old_filing_urls]
+    print(f'[{ticker}]: {len(new_filings)} new filings')
+    new_filing_urls, new_filing_titles, new_filing_dates = map(list, zip(*new_filings)) if new_filings else ([], [], [])
+    if new_filing_urls and record_new_filings:
+        record_new_filings(new_filing_urls, new_filing_titles, new_filing_dates)
+
+    # the new submissions are now the baseline for the next check
+    if filing_urls:
+        _write_filing_metadata(ticker, filing_urls, filing_titles, filing_dates)
+    _save_edgar_submissions_validators(ticker, validators)
+
+    if save_filing_text:
+        for url in new_filing_urls:
+            try:
+                edgar_save_filing_text(ticker, [url])
+            except Exception as e: # fetched again when the filing is loaded
+                print(f'Warning: could not prefetch [{ticker}] filing {url}: {e}')
+
+    return new_filing_urls, new_filing_titles, new_filing_dates
+
+# conditional GET with the ETag/Last-Modified of the previous fetch, returns the new validators, or None if the submissions didn't change
+# the validators are saved separately with _save_edgar_submissions_validators, once the new filings are recorded
+def _refresh_edgar_submissions_json_file(ticker: str) -> dict[str, str] | None:
+    cik = get_cik(ticker)
+
+    os.makedirs(f'{DEFAULT_DATA_DIR}/{ticker}', exist_ok=True)
+    submissions_json_file_path = f'{DEFAULT_DATA_DIR}/{ticker}/submissions_{ticker}.json'
+    validators_file_path = _get_edgar_submissions_validators_file_path(ticker)
+
+    validators: dict[str, str] = {}
+    if os.path.exists(validators_file_path) and os.path.exists(submissions_json_file_path):
+        with open(validators_file_path, 'r', encoding=UTF_8_ENCODING) as f:
+            validators = json.load(f)
+
+    submissions_json_url = f'{EDGAR_SUBMISSIONS_BASE_URL}/CIK{cik}.json'
+    print(f'[{ticker}]: conditional GET {submissions_json_url}')
+    submissions_json, validators = _get_json_if_modified(submissions_json_url, validators, mimic_browser=True)
+    if submissions_json is None:
+        return None
+
+    with open(submissions_json_file_path, 'w', encoding=UTF_8_ENCODING) as f:
+        json.dump(submissions_json, f)
+    return validators
+
+def _save_edgar_submissions_validators(ticker: str, validators: dict[str, str]) -> None:
+    with open(_get_edgar_submissions_validators_file_path(ticker), 'w', encoding=UTF_8_ENCODING) as f:
+        json.dump(validators, f)
+
+def _get_edgar_submissions_validators_file_path(ticker: str) -> str:
+    return f'{DEFAULT_DATA_DIR}/{ticker}/submissions_validators_{ticker}.json'
+
 def _edgar_extract_filing_metadata(ticker: str) -> tuple[list[str], list[str], list[str]]:
     cik = get_cik(ticker)
 
@@ -116,20 +204,23 @@ def _edgar_save_filing_metadata(ticker: str) -> tuple[dict[str, list[str]], dict
     else:
         filing_urls, filing_titles, filing_dates = _edgar_extract_filing_metadata(ticker)
         if filing_urls:
-            with open(urls_file_path, 'w', encoding=UTF_8_ENCODING) as f:
-                for url in filing_urls:
-                    f.write(f'{url}\n')
-            with open(titles_file_path, 'w', encoding=UTF_8_ENCODING) as f:
-                for title in filing_titles:
-                    f.write(f'{title}\n')
-            with open(dates_file_path, 'w', encoding=UTF_8_ENCODING) as f:
-                for filing_date in filing_dates:
-                    f.write(f'{filing_date}\n')
+            _write_filing_metadata(ticker, filing_urls, filing_titles, filing_dates)
 
     return filing_urls, filing_titles, filing_dates
 
+def _write_filing_metadata(ticker: str, filing_urls: list[str], filing_titles: list[str], filing_dates: list[str]) -> None:
+    with open(f'{DEFAULT_DATA_DIR}/{ticker}/filing_urls_{ticker}.txt', 'w', encoding=UTF_8_ENCODING) as f:
+        for url in filing_urls:
+            f.write(f'{url}\n')
+    with open(f'{DEFAULT_DATA_DIR}/{ticker}/filing_titles_{ticker}.txt', 'w', encoding=UTF_8_ENCODING) as f:
+        for title in filing_titles:
+            f.write(f'{title}\n')
+    with open(f'{DEFAULT_DATA_DIR}/{ticker}/filing_dates_{ticker}.txt', 'w', encoding=UTF_8_ENCODING) as f:
+        for filing_date in filing_dates:
+            f.write(f'{filing_date}\n')
+
 # the text of all filings are saved to disk to save on memory usage
-def _edgar_save_filing_text(ticker: str, filing_urls: list[str]) -> None:
+def edgar_save_filing_text(ticker: str, filing_urls: list[str]) -> None:
     output_dir = f'{DEFAULT_DATA_DIR}/{ticker}/{ticker}_filings'
     os.makedirs(output_dir, exist_ok=True)
 
@@ -292,6 +383,47 @@ def _get_json(search_url: str, mimic_browser=False) -> dict[str, Any]:
         time.sleep(delay)
         delay *= 2 # exponential backoff
 
+def _get_json_if_modified(search_url: str, validators: dict[str, str], mimic_browser=False) -> tuple[dict[str, Any] | None, dict[str, str]]:
+    """
+    Fetches JSON content from a URL only if it changed since it was fetched with the given validators.
+
+    Args:
+        search_url (str): The URL to fetch.
+        validators (dict[str, str]): The 'ETag' and/or 'Last-Modified' response headers of the previous fetch, if any.
+
+    Returns:
+        tuple[dict[str, Any] | None, dict[str, str]]: The JSON content, or None if not modified, and the new validators.
+
+    Raises:
+        Exception: If the request fails.
+    """
+
+    headers = _get_headers(search_url, mimic_browser, SCRAPING_USER_AGENT) or {}
+    if validators.get('ETag'):
+        headers['If-None-Match'] = validators['ETag']
+    if validators.get('Last-Modified'):
+        headers['If-Modified-Since'] = validators['Last-Modified']
+
+    response = requests.get(search_url, headers=headers)
+
+    if response.status_code == 304:
+        return None, validators
+
+    if response.status_code != 200:
+        error = f'Failed to fetch [{search_url}]: {response.status_code} {response.reason}'
+        print(f'Error: {error}')
+        raise Exception(error)
+
+    try:
+        content = response.json()
+    except requests.exceptions.JSONDecodeError:
+        if response.headers.get('Content-Encoding') != 'br':
+            raise
+        content = json.loads(decompress(response.content).decode(UTF_8_ENCODING))
+
+    new_validators = {name: response.headers[name] for name in ['ETag', 'Last-Modified'] if name in response.headers}
+    return content, new_validators
+
 def _get_headers(search_url: str, mimic_browser: bool, user_agent: str) -> dict[str, str] | None:
     headers = None
     if mimic_browser:
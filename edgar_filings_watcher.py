@@ -0,0 +1,167 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import datetime
+import json
+import os
+import time
+
+from functools import partial
+from threading import Thread
+
+from edgar_filings_scraper import DEFAULT_DATA_DIR, UTF_8_ENCODING, edgar_save_filing_text, scrape_new_filings_from_edgar
+from tidb_financial_statements_vector_store import check_ticker_exists_in_vector_store, get_ticker_filing_urls, get_vector_store_tickers, load_new_ticker_filings_into_vector_store
+from vector_store_loader_queue import ticker_being_loaded_to_vector_store
+
+EDGAR_WATCHER_POLL_INTERVAL_SECS = int(os.getenv('EDGAR_WATCHER_POLL_INTERVAL_SECS', '3600')) # 0 disables the watcher
+EDGAR_WATCHER_OFF_PEAK_HOURS = os.getenv('EDGAR_WATCHER_OFF_PEAK_HOURS', '1-6') # local hours [start-end) to chunk and embed new filings
+EDGAR_REQUEST_INTERVAL_SECS = 0.2 # stay well under EDGAR's fair access limit of 10 requests/sec
+
+def begin_edgar_filings_watcher_thread(is_daemon = True) -> Thread | None:
+    if not EDGAR_WATCHER_POLL_INTERVAL_SECS:
+        return None
+
+    thread = Thread(target=_watch)
+    thread.daemon = is_daemon
+    thread.start()
+    return thread
+
+# every ticker in the vector store is watched, not just the ones scraped on this machine (data/ doesn't outlive a container)
+def get_watched_tickers() -> list[str]:
+    return get_vector_store_tickers()
+
+def check_for_new_filings(tickers: list[str] = None, save_filing_text: bool = True, use_vector_store: bool = True) -> dict[str, list[str]]:
+    """
+    Polls the submissions feed of each ticker with a conditional request, and records new filings as pending
+    (before their text is prefetched, so a failed download doesn't lose them).
+
+    Args:
+        tickers (list[str]): Tickers to check, defaults to all watched tickers.
+        save_filing_text (bool): Whether to also prefetch the text of the new filings.
+        use_vector_store (bool): Whether tickers not scraped on this machine compare the feed against the filings already in
+            the vector store, otherwise their first poll finds every filing new (e.g. for testing against a feed fixture).
+
+    Returns:
+        dict[str, list[str]]: URLs of the new filings by ticker.
+    """
+
+    new_filing_urls: dict[str, list[str]] = {}
+    for ticker in tickers or get_watched_tickers():
+        if ticker_being_loaded_to_vector_store(ticker): # the full load gets all filings
+            continue
+
+        try:
+            filing_urls, _, _ = scrape_new_filings_from_edgar(ticker, partial(_add_pending_filings, ticker), save_filing_text,
+                                                              partial(get_ticker_filing_urls, ticker) if use_vector_store else None)
+        except Exception as e:
+            print(f'Error checking [{ticker}] for new filings: {e}')
+            continue
+        finally:
+            time.sleep(EDGAR_REQUEST_INTERVAL_SECS)
+
+        if filing_urls:
+            new_filing_urls[ticker] = filing_urls
+    return new_filing_urls
+
+# chunks, embeds and inserts the pending filings of each ticker
+def load_pending_filings(tickers: list[str] = None) -> None:
+    for ticker in tickers or _get_tickers_with_pending_filings():
+        filing_urls, filing_titles, filing_dates = _get_pending_filings(ticker)
+        if not filing_urls or ticker_being_loaded_to_vector_store(ticker): # retry after the full load
+            continue
+
+        try:
+            if not check_ticker_exists_in_vector_store(ticker):
+                _clear_pending_filings(ticker) # the ticker's full load failed, and the next one will include these filings
+                continue
+
+            filings = []
+            for url, title, date in zip(filing_urls, filing_titles, filing_dates):
+                try:
+                    edgar_save_filing_text(ticker, [url]) # no-op for filings prefetched when detected
+                    filings.append((url, title, date))
+                except Exception as e: # stays pending, retried next time
+                    print(f'Error getting new [{ticker}] filing {url}: {e}')
+            if filings:
+                loaded_urls = load_new_ticker_filings_into_vector_store(ticker, *map(list, zip(*filings)))
+                _remove_pending_filings(ticker, loaded_urls) # filings that failed to embed stay pending
+
+        except Exception as e:
+            print(f'Error trying to load new [{ticker}] filings to vector store: {e}')
+
+def _watch():
+    while True:
+        try:
+            check_for_new_filings()
+            if _is_off_peak(datetime.datetime.now()):
+                load_pending_filings()
+
+        except Exception as e:
+            print(f'Error watching EDGAR filings: {e}')
+
+        time.sleep(EDGAR_WATCHER_POLL_INTERVAL_SECS)
+
+def _is_off_peak(now: datetime.datetime) -> bool:
+    start_hour, end_hour = map(int, EDGAR_WATCHER_OFF_PEAK_HOURS.split('-'))
+    if start_hour <= end_hour:
+        return start_hour <= now.hour < end_hour
+    return now.hour >= start_hour or now.hour < end_hour # window spans midnight, e.g. 22-4
+
+# pending filings are saved to disk so they survive restarts until they are in the vector store
+def _get_pending_filings_file_path(ticker: str) -> str:
+    return f'{DEFAULT_DATA_DIR}/{ticker}/pending_filings_{ticker}.json'
+
+def _get_tickers_with_pending_filings() -> list[str]:
+    if not os.path.isdir(DEFAULT_DATA_DIR):
+        return []
+    return sorted(ticker for ticker in os.listdir(DEFAULT_DATA_DIR) if os.path.exists(_get_pending_filings_file_path(ticker)))
+
+def _get_pending_filings(ticker: str) -> tuple[list[str], list[str], list[str]]:
+    pending_filings_file_path = _get_pending_filings_file_path(ticker)
+    if not os.path.exists(pending_filings_file_path):
+        return [], [], []
+
+    with open(pending_filings_file_path, 'r', encoding=UTF_8_ENCODING) as f:
+        pending_filings = json.load(f)
+    return pending_filings['urls'], pending_filings['titles'], pending_filings['dates']
+
+def _add_pending_filings(ticker: str, filing_urls: list[str], filing_titles: list[str], filing_dates: list[str]) -> None:
+    pending_urls, pending_titles, pending_dates = _get_pending_filings(ticker)
+    for url, title, date in zip(filing_urls, filing_titles, filing_dates):
+        if url not in pending_urls:
+            pending_urls.append(url)
+            pending_titles.append(title)
+            pending_dates.append(date)
+
+    with open(_get_pending_filings_file_path(ticker), 'w', encoding=UTF_8_ENCODING) as f:
+        json.dump({'urls': pending_urls, 'titles': pending_titles, 'dates': pending_dates}, f)
+
+def _remove_pending_filings(ticker: str, filing_urls: set[str]) -> None:
+    pending_filings = [filing for filing in zip(*_get_pending_filings(ticker)) if filing[0] not in filing_urls]
+    if not pending_filings:
+        _clear_pending_filings(ticker)
+        return
+
+    pending_urls, pending_titles, pending_dates = map(list, zip(*pending_filings))
+    with open(_get_pending_filings_file_path(ticker), 'w', encoding=UTF_8_ENCODING) as f:
+        json.dump({'urls': pending_urls, 'titles': pending_titles, 'dates': pending_dates}, f)
+
+def _clear_pending_filings(ticker: str) -> None:
+    pending_filings_file_path = _get_pending_filings_file_path(ticker)
+    if os.path.exists(pending_filings_file_path):
+        os.remove(pending_filings_file_path)
+
+if __name__ == '__main__':
+    # test usage: one poll of the given (or all watched) tickers
+    # to test against the local feed fixture (see README), serve one version of it (e.g. with: python -m http.server 8001 -d fixtures/v1),
+    # then run with: MIN_YEAR=2025 EDGAR_SUBMISSIONS_BASE_URL=http://localhost:8001 python edgar_filings_watcher.py MSFT --detect-only
+    parser = argparse.ArgumentParser(description='Check EDGAR for new filings of loaded tickers and load them into the vector store.')
+    parser.add_argument('tickers', nargs='*', help='defaults to all watched tickers')
+    parser.add_argument('--detect-only', action='store_true', help='only record new filings as pending, without downloading them or using the vector store')
+    args = parser.parse_args()
+
+    new_filing_urls = check_for_new_filings(args.tickers, save_filing_text=not args.detect_only, use_vector_store=not args.detect_only)
+    print(f'{new_filing_urls=}')
+    if not args.detect_only:
+        load_pending_filings(args.tickers)
@@ -1,12 +1,13 @@
-import nltk
-
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-
-nltk.download('punkt_tab')
+from functools import cache
 
 CHUNK_OVERLAP = 50
 
 def chunk_filing(text: str, form_type: str) -> list[str]:
+    # imported on first use, only the loader chunks filings
+    import nltk
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    _ensure_sentence_tokenizer()
     sentences = nltk.sent_tokenize(text)
 
     match form_type.rstrip('/A'): # strip amendment suffix
@@ -27,6 +28,15 @@ def chunk_filing(text: str, form_type: str) -> list[str]:
         chunks.extend(text_splitter.split_text(sentence))
     return chunks
 
+# check for the tokenizer model locally (it's installed in the Docker image), only downloading it on first use if missing
+@cache
+def _ensure_sentence_tokenizer() -> None:
+    import nltk
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+    except LookupError:
+        nltk.download('punkt_tab')
+
 if __name__ == '__main__':
     text = 'Includes $3.6 billion of debt at face value related to the Activision Blizzard acquisition. See Note 7 – Business Combinations for further information.'
     chunks = chunk_filing(text, '10-Q')
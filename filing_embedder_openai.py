@@ -3,32 +3,43 @@ load_dotenv()
 
 import os
 
-from openai import OpenAI
+from functools import cache
+from typing import Any, TYPE_CHECKING
 
-from typing import Any
+# the OpenAI client is imported on first use, so the UI can start serving without it
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 OPENAI_EMBEDDING_MODEL = os.getenv('OPENAI_EMBEDDING_MODEL')
 OPENAI_EMBEDDING_API_KEY = os.getenv('OPENAI_EMBEDDING_API_KEY')
 
+API_LIST_SIZE_LIMIT = 2048 # max inputs per embedding request
+
 embed_model_dims = int(os.getenv('OPENAI_EMBEDDING_MODEL_DIMS')) # ref: https://platform.openai.com/docs/models/embeddings
 print(f'{embed_model_dims=}')
 
-client = OpenAI(api_key=OPENAI_EMBEDDING_API_KEY)
-
 def embed_filing_chunk(chunk: str) -> list[float]:
     response = _do_embedding_request(chunk)
     embedding = response.data[0].embedding
     return embedding
 
+# one request per API_LIST_SIZE_LIMIT chunks
 def embed_filing_chunks(chunks: list[str]) -> list[list[float]]:
-    response = _do_embedding_request(chunks)
-    embeddings = [obj.embedding for obj in response.data]
+    embeddings = []
+    for i in range(0, len(chunks), API_LIST_SIZE_LIMIT):
+        response = _do_embedding_request(chunks[i:i + API_LIST_SIZE_LIMIT])
+        embeddings.extend(obj.embedding for obj in response.data)
     return embeddings
 
 def _do_embedding_request(input) -> Any:
-    response = client.embeddings.create(input=input, model=OPENAI_EMBEDDING_MODEL, dimensions=embed_model_dims)
+    response = _get_client().embeddings.create(input=input, model=OPENAI_EMBEDDING_MODEL, dimensions=embed_model_dims)
     return response
 
+@cache
+def _get_client() -> 'OpenAI':
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_EMBEDDING_API_KEY)
+
 if __name__ == '__main__':
     chunk = 'Includes $3.6 billion of debt at face value related to the Activision Blizzard acquisition.'
     embedding = embed_filing_chunk(chunk)
@@ -1,30 +1,39 @@
 import gradio as gr
 
+from company_search_index import mark_ticker_loaded, search_companies
 from edgar_cik import get_companies
+from edgar_filings_watcher import begin_edgar_filings_watcher_thread
 from edgar_filings_scraper import MIN_YEAR
-from langchain_tidb_rag import ask_question
+from langchain_tidb_rag import ask_question, MAX_COMPARE_TICKERS
+from rest_api import begin_rest_api_thread
 from tidb_financial_statements_vector_store import check_ticker_exists_in_vector_store
-from vector_store_loader_queue import begin_vector_store_loader_thread, queue_vector_store_load, ticker_being_loaded_to_vector_store
+from vector_store_loader_queue import begin_vector_store_loader_thread, queue_missing_vector_store_loads, queue_vector_store_load, ticker_being_loaded_to_vector_store
 
 companies = get_companies()
-begin_vector_store_loader_thread()
 
 GREETING = \
 f'''
 Hi, I'm your cool & free <b>$mart $tatement Agent</b> ❤️💵💶💷💴💰
 Ask a question about any of the <b>{f'{len(companies):,}'}</b> companies in the list and I'll look for an answer for you from their <b>{MIN_YEAR}</b> financial statements!
+Pick up to <b>{MAX_COMPARE_TICKERS}</b> companies to compare them.
 '''.strip()
 
 # send_button click handler
-def submit_message(message: str, ticker: str, history: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], str]:
+def submit_message(message: str, tickers: list[str], history: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], str]:
     if not message:
         return history, '' # '' clears the input text box
 
-    if not ticker:
+    if not tickers:
         history.append((None, f'Oops, please select a company from the list... you only have to choose from {len(companies):,} 😊'))
         return history, message
 
-    if not check_ticker_exists_in_vector_store(ticker):
+    if len(tickers) > 1:
+        return _submit_comparison_message(message, tickers, history)
+
+    ticker = tickers[0]
+    if check_ticker_exists_in_vector_store(ticker):
+        mark_ticker_loaded(ticker)
+    else:
         if not ticker_being_loaded_to_vector_store(ticker):
             history.append((None, f"Wow, you're the first person to ask me about <b>{companies[ticker]}</b>! Give me a few minutes to get their {MIN_YEAR} financial statements ⌛"))
             queue_vector_store_load(ticker)
@@ -37,13 +46,36 @@ def submit_message(message: str, ticker: str, history: list[tuple[str, str]]) ->
     history.append((f'[{ticker}] {message}', answer)) # add ticker to start of question to display in UI
     return history, ''
 
+def _submit_comparison_message(message: str, tickers: list[str], history: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], str]:
+    missing_tickers = queue_missing_vector_store_loads(tickers)
+    if missing_tickers:
+        missing_companies = ', '.join(f'<b>{companies[ticker]}</b>' for ticker in missing_tickers)
+        history.append((None, f"I'm still getting the {MIN_YEAR} financial statements for {missing_companies}... give me a few minutes and ask again ⌛"))
+        return history, message
+
+    print(f'question for {tickers}: {message}')
+    answer = ask_question(tickers, message)
+    history.append((f"[{', '.join(tickers)}] {message}", answer)) # add tickers to start of question to display in UI
+    return history, ''
+
+# company_search change handler, only the matching companies are sent to the browser instead of the whole list
+# (a separate text box since the dropdown filters its choices again by its own typed text, hiding fuzzy and word matches)
+def search_company_choices(query: str, tickers: list[str]) -> gr.Dropdown:
+    return gr.Dropdown(choices=_get_company_choices(query, tickers))
+
+def _get_company_choices(query: str, selected_tickers: list[str] = None) -> list[tuple[str, str]]:
+    selected_tickers = selected_tickers or []
+    choices = [(f'{companies[ticker]} [{ticker}]', ticker) for ticker in selected_tickers] # keep the selected companies valid choices
+    choices += [(f'{title} [{ticker}]', ticker) for ticker, title in search_companies(query) if ticker not in selected_tickers]
+    return choices
+
 # retry_button click handler
-def retry_message(ticker: str, history: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], str]:
+def retry_message(tickers: list[str], history: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], str]:
     if history:
         last_message: str = history[-1][0]
         if last_message:
             last_message = last_message.split(']', 1)[1].strip() # remove ticker previously added to start of question
-        return submit_message(last_message, ticker, history)
+        return submit_message(last_message, tickers, history)
     return history, ''
 
 # undo_message click handler
@@ -53,8 +85,8 @@ def undo_message(history: list[tuple[str, str]]) -> tuple[list[tuple[str, str]],
     return history, ''
 
 # clear_button click handler
-def clear_messages() -> tuple[list[tuple[str, str]], str, str]:
-    return [(None, GREETING)], '', None
+def clear_messages() -> tuple[list[tuple[str, str]], str, list[str], str]:
+    return [(None, GREETING)], '', [], ''
 
 with gr.Blocks() as demo:
     gr.Markdown('<h1 style="text-align:center;">The $mart $tatement Agent</h1>')
@@ -70,7 +102,9 @@ with gr.Blocks() as demo:
         with gr.Column(scale=6):
             msg = gr.Textbox(autofocus=True, label='Question?', lines=4)
         with gr.Column(scale=2):
-            company_dropdown = gr.Dropdown(label='Company (name & stock ticker)', choices=[(f'{title} [{ticker}]', ticker) for ticker, title in companies.items()])
+            company_search = gr.Textbox(label='Search companies', placeholder='e.g. micro corp, nvdia, berkshire b', max_lines=1)
+            company_dropdown = gr.Dropdown(label='Company (name & stock ticker)', choices=[],
+                                           multiselect=True, max_choices=MAX_COMPARE_TICKERS)
             send_button = gr.Button('Ask Question')
 
     with gr.Row():
@@ -78,9 +112,16 @@ with gr.Blocks() as demo:
         undo_button = gr.Button('Undo')
         clear_button = gr.Button('Clear')
 
+    company_search.change(search_company_choices, inputs=[company_search, company_dropdown], outputs=[company_dropdown],
+                          trigger_mode='always_last', show_progress='hidden')
     send_button.click(submit_message, inputs=[msg, company_dropdown, chatbot], outputs=[chatbot, msg])
     retry_button.click(retry_message, inputs=[company_dropdown, chatbot], outputs=[chatbot, msg])
     undo_button.click(undo_message, inputs=[chatbot], outputs=[chatbot, msg])
-    clear_button.click(clear_messages, outputs=[chatbot, msg, company_dropdown])
-
-demo.launch(server_name='0.0.0.0')
+    clear_button.click(clear_messages, outputs=[chatbot, msg, company_dropdown, company_search])
+    demo.load(lambda: gr.Dropdown(choices=_get_company_choices('')), outputs=[company_dropdown]) # builds the search index on first page load, not at import
+
+if __name__ == '__main__':
+    begin_rest_api_thread()
+    begin_vector_store_loader_thread()
+    begin_edgar_filings_watcher_thread()
+    demo.launch(server_name='0.0.0.0')
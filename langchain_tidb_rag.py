@@ -2,51 +2,82 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import time
 
-from langchain_community.vectorstores import TiDBVectorStore
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from langchain_core.pydantic_v1 import BaseModel
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from typing import TYPE_CHECKING
 
+from edgar_cik import get_companies
 from filing_embedder_openai import embed_model_dims, OPENAI_EMBEDDING_API_KEY, OPENAI_EMBEDDING_MODEL
-from tidb_financial_statements_vector_store import get_tidb_init_params
+from quantized_vector_index import is_vector_index_enabled
+from tidb_financial_statements_vector_store import get_tidb_init_params, query_ticker_chunks
 
-embeddings = OpenAIEmbeddings(api_key=OPENAI_EMBEDDING_API_KEY, model=OPENAI_EMBEDDING_MODEL, dimensions=embed_model_dims)
-init_params = get_tidb_init_params()
+# the LangChain model and vector store modules are imported on first use, so the UI can start serving without them
+if TYPE_CHECKING:
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+RETRIEVER_CHUNKS = 4 # same as the default LangChain retriever k
+MAX_COMPARE_TICKERS = 5
+COMPARE_CHUNKS_PER_TICKER = 6
+COMPARE_CONTEXT_CHARS_PER_TICKER = 4_000 # budget so each company gets a fair share of the prompt
+
+# define the RAG prompt
+RAG_TEMPLATE = '''Answer the question based only on the following context:
+    {context}
+    Question: {question}
+
+    NOTE: If the answer is not found in the context or cannot be inferred from it, say "I can't find the answer in this year's financial statements."
+
+    Your answer is for an end user so do not mention the word "context"; instead you can refer to "financial statements" if needed.
+    '''
+
+# define the RAG prompt for comparing companies
+COMPARE_RAG_TEMPLATE = '''Answer the question for each of the companies below, comparing them where relevant, based only on the following context (grouped by company):
+    {context}
+    Question: {question}
+
+    NOTE: If the answer for a company is not found in its context or cannot be inferred from it, say "I can't find the answer in this year's financial statements." for that company.
+
+    Your answer is for an end user so do not mention the word "context"; instead you can refer to "financial statements" if needed.
+    '''
 
 class Question(BaseModel):
     __root__: str
 
-def ask_question(ticker: str, question: str) -> str:
+def ask_question(ticker: str | list[str], question: str) -> str:
+    if isinstance(ticker, list):
+        if len(ticker) > 1:
+            return _ask_comparison_question(ticker, question)
+        ticker = ticker[0] if ticker else None
+
+    if ticker and is_vector_index_enabled(): # serve from the ticker's local index (falls back to TiDB if it has none)
+        chunks = query_ticker_chunks(ticker, _get_embeddings().embed_query(question), k=RETRIEVER_CHUNKS)
+        return ask_question_with_context(ticker, question, format_context(chunks))
+
+    from langchain_community.vectorstores import TiDBVectorStore
+    from langchain_core.runnables import RunnableParallel, RunnablePassthrough
+
+    init_params = get_tidb_init_params()
     vectorstore = TiDBVectorStore.from_existing_vector_table(
-        embedding=embeddings,
+        embedding=_get_embeddings(),
         connection_string=init_params['connection_string'],
         table_name=init_params['table_name'])
     search_kwargs = {'filter': {'ticker': ticker}} if ticker else {}
     retriever = vectorstore.as_retriever(search_kwargs=search_kwargs)
 
-    # define the RAG prompt
-    template = '''Answer the question based only on the following context:
-    {context}
-    Question: {question}
+    prompt = _get_prompt(RAG_TEMPLATE)
 
-    NOTE: If the answer is not found in the context or cannot be inferred from it, say "I can't find the answer in this year's financial statements."
-
-    Your answer is for an end user so do not mention the word "context"; instead you can refer to "financial statements" if needed.
-    '''
-    prompt = ChatPromptTemplate.from_template(template)
-
-    # define the RAG model
-    model = ChatOpenAI(temperature=0, model=os.getenv('OPENAI_MODEL'),
-                       max_tokens=16_384) # max for GPT-4o and GPT-4o mini, per: https://platform.openai.com/docs/models
+    model = _get_model()
 
     chain = (
         RunnableParallel({'context': retriever, 'question': RunnablePassthrough()})
         | prompt
         | model
-        | StrOutputParser()
+        | _get_output_parser()
     )
     chain = chain.with_types(input_type=Question)
 
@@ -56,6 +87,77 @@ def ask_question(ticker: str, question: str) -> str:
 
     return answer
 
+# one line per retrieved chunk, labelled with the filing it came from
+def format_context(chunks: list[tuple[str, dict[str, str]]]) -> str:
+    return '\n'.join(f"[{metadata.get('title', '')}] {chunk}" for chunk, metadata in chunks)
+
+# answers a question from context already retrieved by the caller (e.g. batch runs that embed and retrieve up front)
+def ask_question_with_context(ticker: str, question: str, context: str) -> str:
+    chain = _get_prompt(RAG_TEMPLATE) | _get_model() | _get_output_parser()
+
+    print(f'LANGCHAIN RAG Q: [{ticker}] {question}')
+    answer = chain.invoke({'context': context, 'question': question})
+    print(f'A: {answer}')
+
+    return answer
+
+# answers one question across several companies: retrieval runs concurrently per ticker and all contexts go to a single LLM call
+def _ask_comparison_question(tickers: list[str], question: str) -> str:
+    tickers = list(dict.fromkeys(tickers))[:MAX_COMPARE_TICKERS] # dedupe, keep order
+
+    start_time = time.time()
+    query_vector = _get_embeddings().embed_query(question) # embed once, reuse for every company
+    with ThreadPoolExecutor(max_workers=len(tickers)) as executor:
+        contexts = list(executor.map(lambda ticker: _build_ticker_context(ticker, query_vector), tickers))
+    print(f'{tickers} Elapsed time to retrieve: {round(time.time() - start_time, 2)} secs')
+
+    chain = _get_prompt(COMPARE_RAG_TEMPLATE) | _get_model() | _get_output_parser()
+
+    print(f'LANGCHAIN RAG Q: {tickers} {question}')
+    answer = chain.invoke({'context': '\n\n'.join(contexts), 'question': question})
+    print(f'A: {answer}')
+
+    return answer
+
+def _build_ticker_context(ticker: str, query_vector: list[float]) -> str:
+    chunks = query_ticker_chunks(ticker, query_vector, k=COMPARE_CHUNKS_PER_TICKER)
+
+    company = get_companies().get(ticker, ticker)
+    context = f'=== {company} [{ticker}] ==='
+    budget = COMPARE_CONTEXT_CHARS_PER_TICKER
+    for chunk, metadata in chunks: # chunks come back most relevant first
+        if len(chunk) > budget:
+            break
+        context += f"\n[{metadata.get('title', '')}] {chunk}"
+        budget -= len(chunk)
+
+    if not chunks:
+        context += '\n(no financial statements loaded)'
+    return context
+
+@cache
+def _get_prompt(template: str) -> 'ChatPromptTemplate':
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(template)
+
+@cache
+def _get_output_parser() -> 'StrOutputParser':
+    from langchain_core.output_parsers import StrOutputParser
+    return StrOutputParser()
+
+@cache
+def _get_embeddings() -> 'OpenAIEmbeddings':
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(api_key=OPENAI_EMBEDDING_API_KEY, model=OPENAI_EMBEDDING_MODEL, dimensions=embed_model_dims)
+
+@cache
+def _get_model() -> 'ChatOpenAI':
+    from langchain_openai import ChatOpenAI
+    # define the RAG model
+    model = ChatOpenAI(temperature=0, model=os.getenv('OPENAI_MODEL'),
+                       max_tokens=16_384) # max for GPT-4o and GPT-4o mini, per: https://platform.openai.com/docs/models
+    return model
+
 if __name__ == '__main__':
     # test usage
     tickers = ['DOCU', 'MSFT']
@@ -68,3 +170,5 @@ if __name__ == '__main__':
     for ticker in tickers:
         for question in questions:
             answer = ask_question(ticker, question)
+
+    answer = ask_question(['MSFT', 'GOOGL', 'META'], 'Compare the AI capital expenditures.')
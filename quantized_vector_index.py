@@ -0,0 +1,176 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import json
+import os
+
+import numpy as np
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from edgar_filings_scraper import DEFAULT_DATA_DIR, UTF_8_ENCODING
+
+# local index tier next to TiDB, one file per ticker, off (TiDB only) unless set to: 'none' | 'int8' | 'binary'
+VECTOR_INDEX_QUANTIZATION = os.getenv('VECTOR_INDEX_QUANTIZATION', '')
+QUANTIZATION_MODES = ['none', 'int8', 'binary']
+if VECTOR_INDEX_QUANTIZATION and VECTOR_INDEX_QUANTIZATION not in QUANTIZATION_MODES: # fail at startup, not after a TiDB insert
+    raise ValueError(f'VECTOR_INDEX_QUANTIZATION must be one of {QUANTIZATION_MODES} (or unset), not: {VECTOR_INDEX_QUANTIZATION}')
+# quantized search over-fetches this many candidates per result, then rescores them with the full-precision vectors
+RESCORE_CANDIDATES_MULTIPLIER = int(os.getenv('RESCORE_CANDIDATES_MULTIPLIER', '10'))
+# most recently used indexes kept loaded, the full vectors of each are memory-mapped so only their codes take up RAM
+VECTOR_INDEX_CACHE_SIZE = int(os.getenv('VECTOR_INDEX_CACHE_SIZE', '100'))
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+class QuantizedVectorIndex:
+    """
+    Brute-force vector index over one ticker's chunks.
+
+    Candidates are found over the quantized codes (int8 with a per-vector scale, or 1 bit per dimension),
+    then rescored with the full-precision vectors, which are kept as float16 to stay compact on disk.
+    Loaded indexes memory-map the full vectors, so only the rows being rescored are read.
+    """
+
+    def __init__(self, full_vectors: np.ndarray, texts: list[str], metadatas: list[dict[str, Any]], mode: str, normalized: bool = False):
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f'Unknown quantization mode: {mode}')
+
+        if not normalized:
+            full_vectors = np.asarray(full_vectors, dtype=np.float32)
+            norms = np.linalg.norm(full_vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            full_vectors = (full_vectors / norms).astype(np.float16) # unit length, so dot product = cosine similarity
+        self.full_vectors = full_vectors
+        self.texts = texts
+        self.metadatas = metadatas
+        self.mode = mode
+        self.codes, self.scales = _quantize(self.full_vectors, mode)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    # bytes scanned per query (the quantized tier), excludes the full vectors only touched for rescoring
+    @property
+    def nbytes(self) -> int:
+        if self.codes is None: # 'none' scans the full vectors
+            return self.full_vectors.nbytes
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def search(self, query_vector: list[float], k: int, rescore: bool = True) -> list[int]:
+        if not len(self):
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1) # not in place, the caller's array may be reused
+
+        rescore = rescore and self.mode != 'none' # already full precision
+        num_candidates = min(len(self), k * RESCORE_CANDIDATES_MULTIPLIER if rescore else k)
+
+        scores = self._score(query)
+        candidates = np.argpartition(-scores, num_candidates - 1)[:num_candidates]
+        if rescore:
+            scores = self.full_vectors[candidates].astype(np.float32) @ query
+            return candidates[np.argsort(-scores)[:k]].tolist()
+        return candidates[np.argsort(-scores[candidates])[:k]].tolist()
+
+    def query(self, query_vector: list[float], k: int) -> list[tuple[str, dict[str, Any]]]:
+        return [(self.texts[i], self.metadatas[i]) for i in self.search(query_vector, k)]
+
+    def _score(self, query: np.ndarray) -> np.ndarray:
+        match self.mode:
+            case 'int8':
+                return (self.codes.astype(np.float32) @ query) * self.scales
+            case 'binary': # fewer differing bits (Hamming distance) = more similar
+                query_bits = np.packbits(query > 0)
+                return -_POPCOUNT[np.bitwise_xor(self.codes, query_bits)].sum(axis=1, dtype=np.int32).astype(np.float32)
+            case _: # exact, converted per query rather than keeping a float32 copy next to the float16 vectors
+                return self.full_vectors.astype(np.float32) @ query
+
+    def save(self, ticker: str) -> None:
+        # written next to the old files, then swapped in, since loaded indexes may still be reading the old vectors file
+        vectors_file_path, chunks_file_path = _get_index_file_paths(ticker)
+        with open(f'{vectors_file_path}.tmp', 'wb') as f:
+            np.save(f, self.full_vectors)
+        with open(f'{chunks_file_path}.tmp', 'w', encoding=UTF_8_ENCODING) as f:
+            json.dump({'texts': self.texts, 'metadatas': self.metadatas}, f)
+        os.replace(f'{vectors_file_path}.tmp', vectors_file_path)
+        os.replace(f'{chunks_file_path}.tmp', chunks_file_path)
+
+    @classmethod
+    def load(cls, ticker: str, mode: str) -> 'QuantizedVectorIndex':
+        vectors_file_path, chunks_file_path = _get_index_file_paths(ticker)
+        full_vectors = np.load(vectors_file_path, mmap_mode='r') # stored unit length
+        with open(chunks_file_path, 'r', encoding=UTF_8_ENCODING) as f:
+            chunks = json.load(f)
+        return cls(full_vectors, chunks['texts'], chunks['metadatas'], mode, normalized=True) # codes are cheap to rebuild, so only full vectors are stored
+
+def _quantize(vectors: np.ndarray, mode: str) -> tuple[np.ndarray, np.ndarray | None]:
+    match mode:
+        case 'int8': # symmetric, per-vector scale
+            vectors = vectors.astype(np.float32)
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            codes = np.round(vectors / scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        case 'binary': # sign bit per dimension, packed 8 per byte
+            return np.packbits(vectors > 0, axis=1), None
+        case _: # no quantization, the full vectors are searched directly
+            return None, None
+
+def _get_index_file_paths(ticker: str) -> tuple[str, str]:
+    return f'{DEFAULT_DATA_DIR}/{ticker}/vector_index_{ticker}.npy', f'{DEFAULT_DATA_DIR}/{ticker}/vector_index_chunks_{ticker}.json'
+
+_indexes: OrderedDict[str, QuantizedVectorIndex] = OrderedDict() # least recently used first
+_indexes_lock = Lock()
+
+def is_vector_index_enabled() -> bool:
+    return bool(VECTOR_INDEX_QUANTIZATION)
+
+def save_ticker_vector_index(ticker: str, chunk_embeddings: list[tuple[str, list[float], dict[str, Any]]]) -> None:
+    if not chunk_embeddings: # e.g. no filings since MIN_YEAR, drop any stale index so queries go to TiDB
+        for file_path in _get_index_file_paths(ticker):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        with _indexes_lock:
+            _indexes.pop(ticker, None)
+        return
+
+    index = QuantizedVectorIndex(
+        np.array([embedding for (_, embedding, _) in chunk_embeddings], dtype=np.float32).reshape(len(chunk_embeddings), -1),
+        [chunk for (chunk, _, _) in chunk_embeddings],
+        [meta for (_, _, meta) in chunk_embeddings],
+        VECTOR_INDEX_QUANTIZATION)
+    os.makedirs(f'{DEFAULT_DATA_DIR}/{ticker}', exist_ok=True)
+    index.save(ticker)
+    _cache_index(ticker, index)
+    print(f'[{ticker}] Saved {index.mode} vector index: {len(index)} vectors, {index.nbytes:,} bytes')
+
+# adds new chunks to an existing local index, tickers without one keep being served by TiDB
+def append_ticker_vector_index(ticker: str, chunk_embeddings: list[tuple[str, list[float], dict[str, Any]]]) -> None:
+    index = get_ticker_vector_index(ticker)
+    if index is None or not chunk_embeddings:
+        return
+
+    new_urls = {meta['url'] for (_, _, meta) in chunk_embeddings} # replace, not duplicate, chunks of a retried filing
+    existing = [(text, vector, meta) for text, vector, meta in zip(index.texts, index.full_vectors.tolist(), index.metadatas) if meta.get('url') not in new_urls]
+    save_ticker_vector_index(ticker, existing + chunk_embeddings)
+
+# returns None if the ticker has no local index, e.g. it was loaded before the index was enabled
+def get_ticker_vector_index(ticker: str) -> QuantizedVectorIndex | None:
+    with _indexes_lock:
+        index = _indexes.get(ticker)
+        if index is not None:
+            _indexes.move_to_end(ticker)
+    if index is None and os.path.exists(_get_index_file_paths(ticker)[0]):
+        index = QuantizedVectorIndex.load(ticker, VECTOR_INDEX_QUANTIZATION)
+        _cache_index(ticker, index)
+    return index
+
+def _cache_index(ticker: str, index: QuantizedVectorIndex) -> None:
+    with _indexes_lock:
+        _indexes[ticker] = index
+        _indexes.move_to_end(ticker)
+        while len(_indexes) > VECTOR_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
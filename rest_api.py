@@ -1,28 +1,64 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import json
 import os
 import requests
-import uvicorn
 
 from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from threading import Thread
 
 app = FastAPI()
-REST_API_PORT = os.getenv('REST_API_PORT', uvicorn.Config(app).port)
+REST_API_PORT = int(os.getenv('REST_API_PORT', '8000')) # uvicorn's default port
+MAX_BATCH_JOBS = int(os.getenv('MAX_BATCH_JOBS', '10000'))
+MAX_BATCH_CONCURRENCY = 64
 
 @app.get('/heartbeat')
 def heartbeat():
     return 'OK'
 
+class BatchQuestionJob(BaseModel):
+    ticker: str = Field(min_length=1, max_length=20)
+    question: str = Field(min_length=1, max_length=4_000)
+
+# validated up front, so bad requests get a 422 instead of breaking the NDJSON stream after the 200
+class BatchQuestionsRequest(BaseModel):
+    jobs: list[BatchQuestionJob] = Field(min_length=1, max_length=MAX_BATCH_JOBS)
+    max_concurrency: int | None = Field(default=None, gt=0, le=MAX_BATCH_CONCURRENCY)
+    requests_per_minute: int | None = Field(default=None, gt=0)
+
+# streams one NDJSON line per answered job, then a summary line with throughput
+@app.post('/questions/batch')
+def answer_questions_batch(request: BatchQuestionsRequest):
+    # imported here since the answerer's dependencies import this module (for send_heartbeat)
+    from batch_question_answerer import answer_questions, BATCH_MAX_CONCURRENCY, BATCH_REQUESTS_PER_MINUTE
+
+    results = answer_questions([(job.ticker, job.question) for job in request.jobs],
+                               max_concurrency=request.max_concurrency or BATCH_MAX_CONCURRENCY,
+                               requests_per_minute=request.requests_per_minute or BATCH_REQUESTS_PER_MINUTE)
+    return StreamingResponse((f'{json.dumps(result)}\n' for result in results), media_type='application/x-ndjson')
+
+_api_thread: Thread = None
+
+# only the app entry point starts the web server, so importing this module (e.g. for send_heartbeat) has no side effects
+def begin_rest_api_thread() -> Thread:
+    global _api_thread
+    if _api_thread is None:
+        _api_thread = Thread(target=_run_rest_api)
+        _api_thread.daemon = True
+        _api_thread.start()
+    return _api_thread
+
 def _run_rest_api():
+    import uvicorn
     uvicorn.run(app, host='0.0.0.0', port=REST_API_PORT)
 
-api_thread = Thread(target=_run_rest_api)
-api_thread.daemon = True
-api_thread.start()
-
 def send_heartbeat():
+    if _api_thread is None: # no server to keep alive, e.g. when running a CLI
+        return
+
     try:
         response = requests.get(f'http://localhost:{REST_API_PORT}/heartbeat')
         print(f'heartbeat {response.text}')
@@ -31,4 +67,5 @@ def send_heartbeat():
 
 if __name__ == '__main__':
     # test usage
+    begin_rest_api_thread()
     send_heartbeat()
\ No newline at end of file
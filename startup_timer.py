@@ -0,0 +1,52 @@
+import statistics
+import subprocess
+import sys
+import time
+
+# the app and CLI modules, imported the same way their entry points import them
+MODULES = ['edgar_cik', 'filing_chunker', 'filing_embedder_openai', 'rest_api', 'edgar_filings_scraper',
+           'tidb_financial_statements_vector_store', 'langchain_tidb_rag', 'batch_question_answerer', 'gradio_ui']
+RUNS = 5
+APP_READY_MARKER = 'Running on local URL' # printed by gradio once the app serves requests
+
+# times a fresh interpreter importing the module, i.e. the cold-start cost before the module does any work
+def time_import(module: str, runs: int = RUNS) -> float:
+    durations = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], check=True, capture_output=True)
+        durations.append(time.perf_counter() - start_time)
+    return statistics.median(durations)
+
+# times launching the Gradio app until it serves requests
+def time_app_start(runs: int = RUNS) -> float:
+    durations = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-u', 'gradio_ui.py'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        try:
+            for line in process.stdout:
+                if APP_READY_MARKER in line:
+                    durations.append(time.perf_counter() - start_time)
+                    break
+            else:
+                raise RuntimeError(f'gradio_ui.py exited with {process.wait()} before serving requests')
+        finally:
+            process.kill()
+            process.wait()
+    return statistics.median(durations)
+
+if __name__ == '__main__':
+    # usage: python startup_timer.py [--app] [module ...]
+    args = sys.argv[1:]
+    if '--app' in args:
+        args.remove('--app')
+        print(f'gradio_ui.py until serving: {round(time_app_start() * 1000)} ms')
+
+    baseline = time_import('sys')
+    print(f'interpreter startup: {round(baseline * 1000)} ms')
+    for module in args or MODULES:
+        try:
+            print(f'{module}: {round((time_import(module) - baseline) * 1000)} ms')
+        except subprocess.CalledProcessError as e:
+            print(f'{module}: failed -> {e.stderr.decode().strip().splitlines()[-1]}')
@@ -1,16 +1,22 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import hashlib
 import os
 import time
 
-from tidb_vector.integrations import TiDBVectorClient
+from typing import TYPE_CHECKING
 
 from edgar_filings_scraper import get_filing_text, get_form_type, scrape_filings_from_edgar
 from filing_chunker import chunk_filing
 from filing_embedder_openai import embed_filing_chunk, embed_filing_chunks, embed_model_dims
+from quantized_vector_index import append_ticker_vector_index, get_ticker_vector_index, is_vector_index_enabled, save_ticker_vector_index
 from rest_api import send_heartbeat
 
+# the TiDB client (and SQLAlchemy under it) is imported on first use, so the UI can start serving without it
+if TYPE_CHECKING:
+    from tidb_vector.integrations import TiDBVectorClient
+
 ONE_EMBEDDING_REQ_FOR_ALL_CHUNKS_IN_FILING = True
 MAX_INSERT_BATCH_SIZE = os.getenv('MAX_INSERT_BATCH_SIZE')
 
@@ -24,13 +30,16 @@ get_tidb_init_params = lambda drop_existing_table=False: dict(
     # Determine whether to recreate the table if it already exists.
     drop_existing_table=drop_existing_table)
 
-def _get_vector_store(drop_existing_table=False) -> TiDBVectorClient:
+def _get_vector_store(drop_existing_table=False) -> 'TiDBVectorClient':
+    from tidb_vector.integrations import TiDBVectorClient
     vector_store = TiDBVectorClient(**get_tidb_init_params(drop_existing_table))
     return vector_store
 
 def _get_chunk_embeddings(ticker: str) -> list[tuple[str, list[float]], dict[str, str]]:
     filing_urls, filing_titles, filing_dates = scrape_filings_from_edgar(ticker)
+    return _get_filings_chunk_embeddings(ticker, filing_urls, filing_titles, filing_dates)
 
+def _get_filings_chunk_embeddings(ticker: str, filing_urls: list[str], filing_titles: list[str], filing_dates: list[str]) -> list[tuple[str, list[float]], dict[str, str]]:
     start_time = time.time()
     total_chunking_time = 0
 
@@ -50,10 +59,7 @@ def _get_chunk_embeddings(ticker: str) -> list[tuple[str, list[float]], dict[str
 
         try:
             if ONE_EMBEDDING_REQ_FOR_ALL_CHUNKS_IN_FILING:
-                API_LIST_SIZE_LIMIT = 2048
-                sublists = [chunks[i:i + API_LIST_SIZE_LIMIT] for i in range(0, len(chunks), API_LIST_SIZE_LIMIT)]
-                for subchunks in sublists:
-                    embeddings = embed_filing_chunks(subchunks)
+                embeddings = embed_filing_chunks(chunks) # batched by the API list size limit
             else:
                 embeddings = []
                 for chunk in chunks:
@@ -88,6 +94,39 @@ def check_ticker_exists_in_vector_store(ticker):
     print(f'[{ticker}] Ticker exists in vector store: {exists}')
     return exists
 
+# every ticker in the vector store, including ones loaded by other instances or in bulk (see __main__ below)
+def get_vector_store_tickers() -> list[str]:
+    rows = _execute_query(f"SELECT DISTINCT JSON_UNQUOTE(JSON_EXTRACT(meta, '$.ticker')) FROM `{get_tidb_init_params()['table_name']}`")
+    return sorted(row[0] for row in rows if row[0])
+
+def get_ticker_filing_urls(ticker: str) -> set[str]:
+    rows = _execute_query(f"SELECT DISTINCT JSON_UNQUOTE(JSON_EXTRACT(meta, '$.url')) FROM `{get_tidb_init_params()['table_name']}` "
+                          "WHERE JSON_UNQUOTE(JSON_EXTRACT(meta, '$.ticker')) = :ticker", {'ticker': ticker})
+    return {row[0] for row in rows if row[0]}
+
+def _execute_query(sql: str, params: dict[str, str] = None) -> list[tuple]:
+    result = _get_vector_store().execute(sql, params)
+    if not result['success']:
+        raise Exception(f"Error querying vector store: {result['error']}")
+    return result['result']
+
+def query_ticker_chunks(ticker: str, query_vector: list[float], k: int) -> list[tuple[str, dict[str, str]]]:
+    return query_ticker_chunks_batch(ticker, [query_vector], k)[0]
+
+# reuses one connection for all of a ticker's queries, or queries the local index instead if enabled
+def query_ticker_chunks_batch(ticker: str, query_vectors: list[list[float]], k: int) -> list[list[tuple[str, dict[str, str]]]]:
+    if is_vector_index_enabled():
+        index = get_ticker_vector_index(ticker)
+        if index is not None:
+            return [index.query(query_vector, k) for query_vector in query_vectors]
+
+    vector_store = _get_vector_store()
+    results = []
+    for query_vector in query_vectors:
+        result = vector_store.query(filter={'ticker': ticker}, k=k, query_vector=query_vector)
+        results.append([(r.document, r.metadata) for r in result])
+    return results
+
 def load_ticker_filings_into_vector_store(ticker):
     chunk_embeddings = _get_chunk_embeddings(ticker)
     total_embeddings = len(chunk_embeddings)
@@ -112,6 +151,41 @@ def load_ticker_filings_into_vector_store(ticker):
     end_time = time.time()
     print(f'[{ticker}] Elapsed time to insert to vector store: {round(end_time - start_time, 2)} secs')
 
+    if is_vector_index_enabled():
+        save_ticker_vector_index(ticker, chunk_embeddings)
+
+# adds filings (found by scrape_new_filings_from_edgar) to an already loaded ticker, so it stays queryable meanwhile
+# returns the URLs of the filings inserted, filings that failed to embed are skipped
+def load_new_ticker_filings_into_vector_store(ticker: str, filing_urls: list[str], filing_titles: list[str], filing_dates: list[str]) -> set[str]:
+    chunk_embeddings = _get_filings_chunk_embeddings(ticker, filing_urls, filing_titles, filing_dates)
+    total_embeddings = len(chunk_embeddings)
+    print(f'[{ticker}] {total_embeddings} new chunk embeddings')
+
+    batch_size = int(MAX_INSERT_BATCH_SIZE) if MAX_INSERT_BATCH_SIZE else max(total_embeddings, 1)
+    sublists = [chunk_embeddings[i:i + batch_size] for i in range(0, total_embeddings, batch_size)]
+
+    for url in filing_urls: # in case of a previous partial insert of the same filings
+        _get_vector_store().delete(filter={'ticker': ticker, 'url': url})
+    start_time = time.time()
+    for sublist in sublists:
+        print(f'[{ticker}] Inserting {len(sublist)} new embeddings')
+        vector_store = _get_vector_store() # refresh connection
+        vector_store.insert(
+            # the URL hash keeps these IDs distinct from the ones of the initial load
+            ids=[f"{meta['ticker']}_{hashlib.sha256(meta['url'].encode()).hexdigest()[:16]}_{meta['date']}_{meta['form_type']}_{meta['chunk']}" for (_, _, meta) in sublist],
+            texts=[chunk for (chunk, _, _) in sublist],
+            embeddings=[embedding for (_, embedding, _) in sublist],
+            metadatas=[meta for (_, _, meta) in sublist]
+        )
+        send_heartbeat()
+    end_time = time.time()
+    print(f'[{ticker}] Elapsed time to insert new filings to vector store: {round(end_time - start_time, 2)} secs')
+
+    if is_vector_index_enabled():
+        append_ticker_vector_index(ticker, chunk_embeddings)
+
+    return {meta['url'] for (_, _, meta) in chunk_embeddings}
+
 if __name__ == '__main__':
     # test usage
     # tickers = ['DOCU']
@@ -0,0 +1,128 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from typing import Any
+
+from filing_embedder_openai import embed_filing_chunks
+from langchain_tidb_rag import RETRIEVER_CHUNKS
+from quantized_vector_index import QUANTIZATION_MODES, QuantizedVectorIndex
+
+def record_queries(jobs_file: str, output_file: str) -> None:
+    """
+    Embeds a query set once so evaluations can be rerun without calling the embedding API.
+
+    Args:
+        jobs_file (str): JSONL file with one {"ticker": ..., "question": ...} object per line.
+        output_file (str): JSON file to write the queries with their embeddings to.
+    """
+
+    with open(jobs_file, 'r', encoding='utf-8') as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+
+    embeddings = embed_filing_chunks([job['question'] for job in jobs]) # batched to the API's list size limit
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump([{'ticker': job['ticker'], 'question': job['question'], 'embedding': embedding} for job, embedding in zip(jobs, embeddings)], f)
+    print(f'Recorded {len(jobs)} queries to: {output_file}')
+
+def evaluate(recorded_queries_file: str, k: int = RETRIEVER_CHUNKS, dims_options: list[int] = None) -> list[dict[str, Any]]:
+    """
+    Measures recall@k, latency and index size of each quantization mode, with and without rescoring,
+    against exact search over the stored full-precision vectors of each ticker's local index.
+
+    Args:
+        recorded_queries_file (str): JSON file written by record_queries.
+        k (int): Number of results per query.
+        dims_options (list[int]): Reduced dimensions to also try, by truncating the vectors (valid for
+            text-embedding-3 models, which is what the OPENAI_EMBEDDING_MODEL_DIMS setting does).
+
+    Returns:
+        list[dict[str, Any]]: One row per configuration.
+    """
+
+    with open(recorded_queries_file, 'r', encoding='utf-8') as f:
+        queries: list[dict[str, Any]] = json.load(f)
+
+    queries_by_ticker: dict[str, list[np.ndarray]] = {}
+    for query in queries:
+        queries_by_ticker.setdefault(query['ticker'], []).append(np.asarray(query['embedding'], dtype=np.float32))
+
+    base_indexes: dict[str, QuantizedVectorIndex] = {}
+    for ticker in queries_by_ticker:
+        try:
+            base_indexes[ticker] = QuantizedVectorIndex.load(ticker, 'none')
+        except FileNotFoundError:
+            print(f'Warning: no local vector index for [{ticker}], skipping its queries')
+
+    # exact top k over the full vectors is the ground truth
+    ground_truths: dict[str, list[set[int]]] = {}
+    for ticker, index in base_indexes.items():
+        full_vectors = index.full_vectors.astype(np.float32)
+        ground_truths[ticker] = [set(np.argsort(-(full_vectors @ (query / np.linalg.norm(query))))[:k].tolist()) for query in queries_by_ticker[ticker]]
+
+    rows = []
+    for dims in [None] + (dims_options or []):
+        for mode in QUANTIZATION_MODES:
+            for rescore in ([False] if mode == 'none' else [False, True]):
+                recalls: list[float] = []
+                latencies: list[float] = []
+                index_bytes = 0
+                full_bytes = 0
+                num_vectors = 0
+                for ticker, base_index in base_indexes.items():
+                    index = QuantizedVectorIndex(base_index.full_vectors[:, :dims], base_index.texts, base_index.metadatas, mode)
+                    index_bytes += index.nbytes
+                    full_bytes += index.full_vectors.nbytes
+                    num_vectors += len(index)
+
+                    for query, ground_truth in zip(queries_by_ticker[ticker], ground_truths[ticker]):
+                        start_time = time.perf_counter()
+                        found = index.search(query[:dims], k, rescore=rescore)
+                        latencies.append(time.perf_counter() - start_time)
+                        recalls.append(len(ground_truth.intersection(found)) / len(ground_truth))
+
+                rows.append({
+                    'dims': dims or (base_index.full_vectors.shape[1] if base_indexes else 0),
+                    'mode': mode,
+                    'rescore': rescore,
+                    f'recall@{k}': round(statistics.mean(recalls), 4) if recalls else 0.0,
+                    'p50_latency_ms': round(statistics.median(latencies) * 1000, 3) if latencies else 0.0,
+                    'index_bytes_per_vector': round(index_bytes / num_vectors, 1) if num_vectors else 0.0,
+                    'full_bytes_per_vector': round(full_bytes / num_vectors, 1) if num_vectors else 0.0,
+                })
+    return rows
+
+if __name__ == '__main__':
+    # usage:
+    #   python vector_index_eval.py record jobs.jsonl queries.json
+    #   python vector_index_eval.py evaluate queries.json --k 4 --dims 512 256
+    # the tickers must have been loaded with VECTOR_INDEX_QUANTIZATION set, so their local index exists
+    parser = argparse.ArgumentParser(description='Recall@k vs. size/latency evaluation of the quantized vector index modes.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='embed a query set once')
+    record_parser.add_argument('jobs_file', help='JSONL file with one {"ticker": ..., "question": ...} object per line')
+    record_parser.add_argument('output_file', help='JSON file to write the recorded queries to')
+
+    evaluate_parser = subparsers.add_parser('evaluate', help='evaluate the quantization modes over a recorded query set')
+    evaluate_parser.add_argument('recorded_queries_file')
+    evaluate_parser.add_argument('--k', type=int, default=RETRIEVER_CHUNKS)
+    evaluate_parser.add_argument('--dims', type=int, nargs='*', default=[], help='reduced dimensions to also evaluate')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record_queries(args.jobs_file, args.output_file)
+    else:
+        rows = evaluate(args.recorded_queries_file, args.k, args.dims)
+        if rows:
+            columns = list(rows[0].keys())
+            print(' | '.join(columns))
+            for row in rows:
+                print(' | '.join(str(row[column]) for column in columns))
@@ -1,7 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
 from threading import Lock, Thread
 
-from tidb_financial_statements_vector_store import load_ticker_filings_into_vector_store
+from company_search_index import mark_ticker_loaded
+from tidb_financial_statements_vector_store import check_ticker_exists_in_vector_store, load_ticker_filings_into_vector_store
 
 def begin_vector_store_loader_thread(is_daemon = False) -> Thread:
     thread = Thread(target=_queue_handler)
@@ -23,6 +25,21 @@ def ticker_being_loaded_to_vector_store(ticker: str) -> bool:
     with _in_process_lock:
         return _is_in_process(ticker)
 
+# checks all tickers concurrently and queues the missing ones together, returns the tickers not yet in the vector store
+def queue_missing_vector_store_loads(tickers: list[str]) -> list[str]:
+    with ThreadPoolExecutor(max_workers=max(len(tickers), 1)) as executor:
+        exists = list(executor.map(check_ticker_exists_in_vector_store, tickers))
+
+    missing_tickers = []
+    for ticker, ticker_exists in zip(tickers, exists):
+        if ticker_exists:
+            mark_ticker_loaded(ticker)
+        else:
+            missing_tickers.append(ticker)
+    for ticker in missing_tickers:
+        queue_vector_store_load(ticker)
+    return missing_tickers
+
 def _is_in_process(ticker: str):
     exists = ticker in _tickers_in_process
     return exists
@@ -32,6 +49,7 @@ def _queue_handler():
         try:
             ticker: str = _vector_store_loader_queue.get()
             load_ticker_filings_into_vector_store(ticker)
+            mark_ticker_loaded(ticker)
             _vector_store_loader_queue.task_done()
 
         except Exception as e: